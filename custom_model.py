@@ -6,6 +6,8 @@ import argparse
 import os
 import time
 import re
+import io
+import concurrent.futures
 
 try:
     from colorama import init, Fore, Style
@@ -14,16 +16,111 @@ try:
 except ImportError:
     colorama_available = False
 
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+# Shared HTTP session so repeated API calls reuse the same keep-alive connection
+_SESSION = requests.Session()
+
+# Precompiled regular expressions used by the code extraction and fixing helpers
+_CODE_BLOCK_RE = re.compile(r'```(?:python)?\n([\s\S]*?)```')
+_INDENTED_RE = re.compile(r'(?:^|\n)( {4}|\t)(.+)(?:\n|$)')
+
+# Python-like lines recognised by extract_python_like_code: block headers at
+# column 0 and variable assignments with common Python types, fused into one
+# alternation so each line is matched once
+_ASSIGNMENT_PATTERN = r'(?<!\w)\w+\s*=\s*(?:[\'"]\w+[\'"]|\d+|\[.+\]|\{.+\}|\(.+\))'
+_ASSIGNMENT_RE = re.compile(_ASSIGNMENT_PATTERN)
+_PYTHON_LINE_RE = re.compile(rf'^(?P<block>def|class|if|for|while)\b|(?P<assignment>{_ASSIGNMENT_PATTERN})')
+
+# Interactive prompts, IPython output numbering and object representations
+# (whole lines, including their newline, so they can be removed in one substitution)
+_INTERACTIVE_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:>>>|\.\.\.|In \[\d+\]:|Out\[\d+\]:|\[\d+\]:|<\w+ (?:object|at) [^\n]+>)[^\n]*(?:\n|\Z)',
+    re.MULTILINE)
+
+_DEF_RE = re.compile(r'^def\s+\w+\s*\(')
+_CLASS_RE = re.compile(r'^class\s+(\w+)')
+_MAIN_RE = re.compile(r'^if\s+__name__\s*==\s*[\'"]__main__[\'"]')
+_METHOD_RE = re.compile(r'^\s*def\s+(\w+)')
+_CLASS_OR_INIT_RE = re.compile(
+    r'^(?P<indent>[^\S\n]*)(?:class[^\S\n]+(?P<cls>\w+)|def[^\S\n]+__init__[^\S\n]*\()', re.MULTILINE)
+
+_CLASS_NAME_RE = re.compile(r'class\s+(\w+)')
+_FUNCTION_NAME_RE = re.compile(r'def\s+(\w+)')
+_FILENAME_INVALID_RE = re.compile(r'[^a-z0-9_]')
+_CAMEL_RE = re.compile(r'(?<!^)(?=[A-Z])')
+_KEYWORD_RE = re.compile(r'\b[a-zA-Z][a-zA-Z0-9_]{2,}\b')
+_SANITIZE_NAME_RE = re.compile(r'[^\w_]')
+# Translation table equivalent to _SANITIZE_NAME_RE for ASCII names
+_SANITIZE_NAME_TABLE = {c: '_' for c in range(128) if not (chr(c).isalnum() or chr(c) == '_')}
+_IMPORT_RE = re.compile(r'^[^\S\n]*(?:import[^\S\n]+([^\n#]+)|from[^\S\n]+([\w\.]+)[^\S\n]+import)', re.MULTILINE)
+
+_TREE_NODE_CLASS_RE = re.compile(r'^(\s*)class\s+(TreeNode|Node)\s*:\s*$')
+_BST_CLASS_RE = re.compile(r'^(\s*)class\s+(BinarySearchTree|BST)\s*:')
+_KEY_INIT_RE = re.compile(r'^\s*def\s+__init__\s*\(\s*self\s*,\s*(?:key|val|value)')
+_KEY_ASSIGN_RE = re.compile(r'self\.(?:key|val|value)\s*=\s*(?:key|val|value)')
+_INIT_KEY_PARAM_RE = re.compile(r'def\s+__init__\s*\(\s*self\s*,\s*(\w+)')
+_NODE_ATTR_RES = {attr: re.compile(rf'self\.{attr}\s*=') for attr in ['key', 'val', 'value', 'left', 'right']}
+
+# Standard library modules, used to group imports and filter requirements
+_STD_LIB_MODULES = frozenset({
+    'abc', 'argparse', 'array', 'ast', 'asyncio', 'base64', 'bisect', 'calendar',
+    'collections', 'concurrent', 'contextlib', 'copy', 'csv', 'datetime', 'decimal',
+    'difflib', 'enum', 'errno', 'fnmatch', 'functools', 'gc', 'glob', 'gzip', 'hashlib',
+    'heapq', 'hmac', 'html', 'http', 'importlib', 'inspect', 'io', 'itertools', 'json',
+    'logging', 'math', 'multiprocessing', 'operator', 'os', 'pathlib', 'pickle', 'platform',
+    'pprint', 'queue', 'random', 're', 'shutil', 'signal', 'socket', 'sqlite3', 'ssl',
+    'statistics', 'string', 'struct', 'subprocess', 'sys', 'tempfile', 'threading',
+    'time', 'timeit', 'traceback', 'types', 'typing', 'uuid', 'warnings', 'weakref',
+    'xml', 'xmlrpc', 'zipfile', 'zlib', 'tkinter', 'tk', 'ttk'
+})
+
+# Words ignored when deriving a project name from the prompt
+_PROJECT_NAME_COMMON_WORDS = frozenset({
+    'the', 'and', 'that', 'with', 'for', 'create', 'implement', 'build', 'make', 'code',
+    'write', 'script', 'program', 'python'
+})
+
+# Map common package imports to their PyPI names
+_PACKAGE_MAPPING = {
+    'bs4': 'beautifulsoup4',
+    'sklearn': 'scikit-learn',
+    'PIL': 'pillow',
+    'cv2': 'opencv-python',
+    'pygame': 'pygame',
+    'np': 'numpy',
+    'pd': 'pandas',
+    'plt': 'matplotlib',
+    'tf': 'tensorflow',
+    'torch': 'torch',
+    'db': 'sqlalchemy',
+}
+
+# Resolved colorama prefixes keyed by (color, style)
+_COLOR_PREFIX_CACHE = {}
+
 def colored_print(text, color=None, style=None):
     """Print colored text if colorama is available"""
     if colorama_available:
-        color_code = getattr(Fore, color.upper(), '') if color else ''
-        style_code = getattr(Style, style.upper(), '') if style else ''
-        reset = Style.RESET_ALL
-        print(f"{color_code}{style_code}{text}{reset}")
+        prefix = _COLOR_PREFIX_CACHE.get((color, style))
+        if prefix is None:
+            color_code = getattr(Fore, color.upper(), '') if color else ''
+            style_code = getattr(Style, style.upper(), '') if style else ''
+            prefix = _COLOR_PREFIX_CACHE[(color, style)] = f"{color_code}{style_code}"
+        print(f"{prefix}{text}{Style.RESET_ALL}")
     else:
         print(text)
 
+def parse_json(data):
+    """Parse JSON from str or bytes, using orjson if it is available"""
+    if orjson_available:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def get_prompt(args):
     """Get the prompt from command line args or file"""
     if args.prompt:
@@ -45,6 +142,34 @@ def get_prompt(args):
         colored_print(f"Error reading file: {e}", 'red')
         return None
 
+def iter_stream_lines(response):
+    """Yield the lines of a streaming response as bytes
+    
+    Reads raw chunks as they arrive into a bytearray buffer and splits it
+    on newlines, avoiding a str decode and copy for every line.
+    
+    Args:
+        response: A streaming requests response
+        
+    Yields:
+        bytes: Each line without its line ending
+    """
+    buf = bytearray()
+    for chunk in response.iter_content(chunk_size=None):
+        buf.extend(chunk)
+        start = 0
+        while True:
+            nl = buf.find(b'\n', start)
+            if nl == -1:
+                break
+            yield bytes(buf[start:nl]).rstrip(b'\r')
+            start = nl + 1
+        del buf[:start]
+    
+    # Flush a trailing line that has no newline
+    if buf:
+        yield bytes(buf).rstrip(b'\r')
+
 def call_lm_studio_stream(prompt, args):
     """Call LM Studio API with streaming enabled"""
     api_url = args.api_url if args.api_url else "http://localhost:1234/v1/chat/completions"
@@ -62,44 +187,58 @@ def call_lm_studio_stream(prompt, args):
         colored_print("Connecting to your API...", 'blue')
         
         # Create a buffer for the entire response
-        full_text = ""
-        buffer = ""
+        full_text = io.StringIO()
         
         # Open the connection and stream the response
-        with requests.post(api_url, json=payload, headers=headers, stream=True) as response:
+        with _SESSION.post(api_url, json=payload, headers=headers, stream=True) as response:
             response.raise_for_status()
             
             colored_print("\nModel Response:", 'green', 'bright')
             colored_print("-" * 40, 'green')
             
-            for line in response.iter_lines():
+            # Write tokens straight to the binary stdout and only flush at word or
+            # line boundaries (or once enough bytes are pending), not on every token
+            sys.stdout.flush()
+            out = getattr(sys.stdout, 'buffer', None)
+            encoding = sys.stdout.encoding or 'utf-8'
+            pending = 0
+            
+            for line in iter_stream_lines(response):
                 if line:
-                    line_text = line.decode('utf-8')
-                    
                     # Skip the "data: " prefix and process JSON
-                    if line_text.startswith('data: '):
-                        data_str = line_text[6:]  # Skip 'data: '
+                    # (kept as bytes; the JSON parser decodes UTF-8 itself)
+                    if line.startswith(b'data: '):
+                        data = line[6:]  # Skip 'data: '
                         
                         # Check for the end of stream
-                        if data_str == '[DONE]':
+                        if data == b'[DONE]':
                             break
                             
                         try:
-                            chunk = json.loads(data_str)
+                            chunk = parse_json(data)
                             if 'choices' in chunk and len(chunk['choices']) > 0:
                                 delta = chunk['choices'][0].get('delta', {})
                                 if 'content' in delta:
                                     content = delta['content']
-                                    print(content, end='', flush=True)
-                                    full_text += content
-                                    buffer += content
+                                    if out is None:
+                                        print(content, end='', flush=True)
+                                    else:
+                                        content_bytes = content.encode(encoding, errors='replace')
+                                        out.write(content_bytes)
+                                        pending += len(content_bytes)
+                                        if pending > 64 or b' ' in content_bytes or b'\n' in content_bytes:
+                                            out.flush()
+                                            pending = 0
+                                    full_text.write(content)
                         except json.JSONDecodeError:
-                            pass  # Skip malformed JSON
+                            pass  # Skip malformed JSON (orjson.JSONDecodeError is a subclass)
             
+            if out is not None:
+                out.flush()
             print("\n")  # Add newline after streaming completes
             colored_print("-" * 40, 'green')
             
-            return full_text
+            return full_text.getvalue()
             
     except requests.RequestException as e:
         colored_print(f"Error communicating with model server: {e}", 'red')
@@ -127,10 +266,10 @@ def call_lm_studio_non_stream(prompt, args):
     try:
         colored_print("Connecting to LM Studio API...", 'blue')
         
-        response = requests.post(api_url, json=payload, headers=headers)
+        response = _SESSION.post(api_url, json=payload, headers=headers)
         response.raise_for_status()
         
-        data = response.json()
+        data = parse_json(response.content)
         
         # Extract the completion from the response
         if 'choices' in data and len(data['choices']) > 0:
@@ -147,6 +286,9 @@ def call_lm_studio_non_stream(prompt, args):
             colored_print(json.dumps(data, indent=2), 'yellow')
             return None
             
+    except json.JSONDecodeError as e:
+        colored_print(f"Error decoding response from model server: {e}", 'red')
+        return None
     except requests.RequestException as e:
         colored_print(f"Error communicating with model server: {e}", 'red')
         if hasattr(e, 'response') and e.response is not None:
@@ -168,7 +310,8 @@ def extract_code_blocks(text, clean_output=False):
         str: Extracted and cleaned code
     """
     # First try to find code blocks with triple backticks
-    code_blocks = re.findall(r'```(?:python)?\n([\s\S]*?)```', text)
+    # (the substring checks skip the regex scans when they cannot match)
+    code_blocks = _CODE_BLOCK_RE.findall(text) if '```' in text else None
     
     if code_blocks:
         code = '\n\n'.join(code_blocks)
@@ -180,7 +323,7 @@ def extract_code_blocks(text, clean_output=False):
         return code
     
     # If no code blocks are found with backticks, try to extract indented code
-    indented_blocks = re.findall(r'(?:^|\n)( {4}|\t)(.+)(?:\n|$)', text)
+    indented_blocks = _INDENTED_RE.findall(text) if '    ' in text or '\t' in text else None
     if indented_blocks:
         code = '\n'.join(line[1] for line in indented_blocks)
         
@@ -213,34 +356,46 @@ def extract_python_like_code(text):
     Returns:
         str: Extracted Python-like code or None if not found
     """
-    # Look for common Python patterns
-    python_patterns = [
-        # Function definitions
-        r'def\s+\w+\s*\([^)]*\):\s*(?:\n\s+.+)+',
-        # Class definitions
-        r'class\s+\w+(?:\([^)]*\))?:\s*(?:\n\s+.+)+',
-        # If statements
-        r'if\s+.+:\s*(?:\n\s+.+)+',
-        # For loops
-        r'for\s+.+:\s*(?:\n\s+.+)+',
-        # Variable assignments with common Python types
-        r'\w+\s*=\s*(?:[\'"]\w+[\'"]|\d+|\[.+\]|\{.+\}|\(.+\))'
-    ]
-    
+    # Scan forward over the lines once, so the fragments come out in text order
+    # and no pattern can backtrack across lines
+    lines = text.split('\n')
     code_fragments = []
+    n = len(lines)
+    i = 0
     
-    for pattern in python_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            code_fragments.extend(matches)
+    while i < n:
+        # Decorators belong to the block that follows them
+        header = i
+        while header < n and lines[header].startswith('@'):
+            header += 1
+        
+        header_line = lines[header] if header < n else ''
+        match = _PYTHON_LINE_RE.search(header_line)
+        is_block = match is not None and match.lastgroup == 'block'
+        
+        # Function/class definitions, if statements and loops with an indented body
+        if is_block and header_line.rstrip().endswith(':'):
+            end = _trimmed_block_end(lines, header)
+            if end > header + 1:
+                code_fragments.append('\n'.join(lines[i:end]))
+                i = end
+                continue
+        
+        if header > i:
+            # Stray decorators without a block
+            i = header
+            continue
+        
+        # Variable assignments with common Python types (a keyword line that
+        # did not turn out to be a block may still contain one)
+        if is_block:
+            match = _ASSIGNMENT_RE.search(header_line)
+        if match:
+            code_fragments.append(match.group(0))
+        i += 1
     
     if code_fragments:
-        # Sort the fragments based on their position in the original text
-        positions = [(text.find(frag), frag) for frag in code_fragments if text.find(frag) >= 0]
-        positions.sort()
-        
-        # Join the sorted fragments
-        return '\n\n'.join(frag for _, frag in positions)
+        return '\n\n'.join(code_fragments)
     
     return None
 
@@ -259,28 +414,35 @@ def clean_code_for_execution(code):
         str: Cleaned code ready for execution
     """
     # Remove lines that look like terminal output (not part of the code)
-    lines = code.split('\n')
-    cleaned_lines = []
+    code = _strip_interactive_output(code)
     
-    for line in lines:
-        # Skip typical output lines and interactive Python prompts
-        if (re.match(r'^(>>>|\.\.\.|In \[\d+\]:|Out\[\d+\]:)', line.strip()) or
-            re.match(r'^(\[\d+\]:)', line.strip()) or  # IPython style output numbering
-            re.match(r'^<(\w+) (object|at) .+>', line.strip())):  # Object representations
-            continue
-        
-        cleaned_lines.append(line)
-    
-    # Rejoin the lines
-    code = '\n'.join(cleaned_lines)
+    # Split once and run the remaining passes over the same list of lines
+    lines = code.split('\n')
     
     # Try to reorder the code to ensure definitions come before usage
-    code = reorder_code(code)
+    lines = _reorder_code_lines(lines)
     
     # Move imports to the top
-    code = move_imports_to_top(code)
+    lines = _move_imports_to_top_lines(lines)
     
-    return code
+    return '\n'.join(lines)
+
+def _strip_interactive_output(code):
+    """Remove lines that look like interactive prompts or terminal output
+    
+    Args:
+        code (str): The code to clean
+        
+    Returns:
+        str: Code without interactive outputs
+    """
+    cleaned = _INTERACTIVE_LINE_RE.sub('', code)
+    
+    # Removing an unterminated last line leaves the newline before it behind
+    if cleaned.endswith('\n') and not code.endswith('\n'):
+        cleaned = cleaned[:-1]
+    
+    return cleaned
 
 def reorder_code(code):
     """Reorder code to ensure definitions come before usage
@@ -294,14 +456,22 @@ def reorder_code(code):
     Returns:
         str: Reordered code
     """
-    lines = code.split('\n')
+    return '\n'.join(_reorder_code_lines(code.split('\n')))
+
+def _reorder_code_lines(lines):
+    """Line-based implementation of reorder_code
     
+    Args:
+        lines (list): Lines of code to reorder
+        
+    Returns:
+        list: Reordered lines, ending with an empty line so the joined code ends with a newline
+    """
     # Organize code into logical blocks
     code_blocks = []
     current_block = []
     in_function_def = False
     in_class_def = False
-    in_docstring = False
     
     # First pass: divide code into logical blocks
     for i, line in enumerate(lines):
@@ -315,29 +485,25 @@ def reorder_code(code):
             current_block.append('')
             continue
         
-        # Handle common code patterns
-        if re.match(r'^def\s+\w+\s*\(', line_stripped):
+        # Handle common code patterns (cheap prefix checks gate the regexes)
+        if line_stripped.startswith('def') and _DEF_RE.match(line_stripped):
             # This is a function definition - start a new code block
             if current_block:
                 code_blocks.append(current_block)
                 current_block = []
             in_function_def = True
             current_block.append(line)
-        elif re.match(r'^class\s+\w+', line_stripped):
+        elif line_stripped.startswith('class') and _CLASS_RE.match(line_stripped):
             # This is a class definition - start a new code block
             if current_block:
                 code_blocks.append(current_block)
                 current_block = []
             in_class_def = True
             current_block.append(line)
-        elif line_stripped.startswith('"""') or line_stripped.startswith("'''"):
-            # This might be a docstring
-            in_docstring = not in_docstring
-            current_block.append(line)
         elif in_function_def or in_class_def or line_stripped.startswith('#'):
             # This is part of a function, class or a comment
             current_block.append(line)
-        elif re.match(r'^if\s+__name__\s*==\s*[\'"]__main__[\'"]', line_stripped):
+        elif line_stripped.startswith('if') and _MAIN_RE.match(line_stripped):
             # This is a main block - start a new code block
             if current_block:
                 code_blocks.append(current_block)
@@ -388,27 +554,19 @@ def reorder_code(code):
     # Rebuild the code in a logical order
     ordered_blocks = import_blocks + class_blocks + function_blocks + other_blocks + main_blocks
     
-    # Join blocks with appropriate spacing
+    # Join blocks with appropriate spacing, removing extra spaces at the
+    # end of lines in the same pass
     final_lines = []
     for i, block in enumerate(ordered_blocks):
         if i > 0 and block:  # Add a blank line between blocks
             final_lines.append('')
-        final_lines.extend(block)
-    
-    # Final cleanup - ensure consistent whitespace
-    cleaned_lines = []
-    for line in final_lines:
-        # Remove extra spaces at the end of lines
-        cleaned_lines.append(line.rstrip())
-    
-    # Join the cleaned lines with newlines
-    reordered_code = '\n'.join(cleaned_lines)
+        final_lines.extend(line.rstrip() for line in block)
     
     # Ensure code ends with a newline
-    if reordered_code and not reordered_code.endswith('\n'):
-        reordered_code += '\n'
+    if final_lines and final_lines[-1]:
+        final_lines.append('')
         
-    return reordered_code
+    return final_lines
 
 def move_imports_to_top(code):
     """Move import statements to the top of the file
@@ -422,8 +580,17 @@ def move_imports_to_top(code):
     Returns:
         str: Fixed code with imports at the top
     """
-    lines = code.split('\n')
+    return '\n'.join(_move_imports_to_top_lines(code.split('\n')))
+
+def _move_imports_to_top_lines(lines):
+    """Line-based implementation of move_imports_to_top
     
+    Args:
+        lines (list): Lines of code to fix
+        
+    Returns:
+        list: Lines with imports at the top
+    """
     # Find all import statements
     import_lines = []
     non_import_lines = []
@@ -437,27 +604,15 @@ def move_imports_to_top(code):
         else:
             non_import_lines.append(line)
     
-    # If there are no imports, return the original code
+    # If there are no imports, return the original lines
     if not import_lines:
-        return code
+        return lines
     
     # Group imports: standard library first, then third-party, then local
     std_lib_imports = []
     third_party_imports = []
     local_imports = []
     
-    std_lib_modules = [
-        'abc', 'argparse', 'array', 'ast', 'asyncio', 'base64', 'bisect', 'calendar',
-        'collections', 'concurrent', 'contextlib', 'copy', 'csv', 'datetime', 'decimal',
-        'difflib', 'enum', 'errno', 'fnmatch', 'functools', 'gc', 'glob', 'gzip', 'hashlib',
-        'heapq', 'hmac', 'html', 'http', 'importlib', 'inspect', 'io', 'itertools', 'json',
-        'logging', 'math', 'multiprocessing', 'operator', 'os', 'pathlib', 'pickle', 'platform',
-        'pprint', 'queue', 'random', 're', 'shutil', 'signal', 'socket', 'sqlite3', 'ssl',
-        'statistics', 'string', 'struct', 'subprocess', 'sys', 'tempfile', 'threading',
-        'time', 'timeit', 'traceback', 'types', 'typing', 'uuid', 'warnings', 'weakref',
-        'xml', 'xmlrpc', 'zipfile', 'zlib'
-    ]
-    
     # Categorize imports
     for line in import_lines:
         stripped = line.strip()
@@ -469,7 +624,7 @@ def move_imports_to_top(code):
             module = stripped.split('import ')[1].split(' as ')[0].split(',')[0].strip()
         
         # Categorize by module type
-        if module in std_lib_modules:
+        if module in _STD_LIB_MODULES:
             std_lib_imports.append(line)
         elif module.startswith('.'):
             local_imports.append(line)
@@ -486,8 +641,7 @@ def move_imports_to_top(code):
     if all_imports and non_import_lines and non_import_lines[0].strip():
         all_imports.append('')
     
-    result = '\n'.join(all_imports + non_import_lines)
-    return result
+    return all_imports + non_import_lines
 
 def generate_filename_from_content(code, prompt):
     """Generate a suitable filename based on code content or prompt
@@ -500,13 +654,13 @@ def generate_filename_from_content(code, prompt):
         str: A suitable filename (with .py extension)
     """
     # Try to extract a class or function name from the code
-    class_match = re.search(r'class\s+(\w+)', code)
-    function_match = re.search(r'def\s+(\w+)', code)
+    class_match = _CLASS_NAME_RE.search(code)
+    function_match = _FUNCTION_NAME_RE.search(code)
     
     if class_match:
         # Convert CamelCase to snake_case for filename
         name = class_match.group(1)
-        filename = ''.join(['_' + c.lower() if c.isupper() else c for c in name]).lstrip('_')
+        filename = _CAMEL_RE.sub('_', name).lower().lstrip('_')
         return f"{filename}.py"
     elif function_match:
         return f"{function_match.group(1)}.py"
@@ -521,13 +675,52 @@ def generate_filename_from_content(code, prompt):
             # Use up to 3 words for the filename
             name = '_'.join(relevant_words[:3])
             # Cleanup any non-alphanumeric characters
-            name = re.sub(r'[^a-z0-9_]', '', name)
+            name = _FILENAME_INVALID_RE.sub('', name)
             return f"{name}.py"
         else:
             # Default name with timestamp
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             return f"code_{timestamp}.py"
 
+def _block_end(lines, start, indent):
+    """Find where an indented block ends
+    
+    Blank lines and lines indented deeper than the block header belong to the block.
+    
+    Args:
+        lines (list): Lines of code
+        start (int): Index of the first line after the block header
+        indent (int): Indentation width of the block header
+        
+    Returns:
+        int: Index of the first line after the block
+    """
+    n = len(lines)
+    j = start
+    while j < n:
+        line = lines[j]
+        # Slicing avoids building a stripped copy of every line just to measure it
+        if line and not line.isspace() and not line[:indent + 1].isspace():
+            break
+        j += 1
+    return j
+
+def _trimmed_block_end(lines, start):
+    """Find where the block opened on line start ends, excluding trailing blank lines
+    
+    Args:
+        lines (list): Lines of code
+        start (int): Index of the block header line
+        
+    Returns:
+        int: Index of the first line after the method body
+    """
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    end = _block_end(lines, start + 1, indent)
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return end
+
 def fix_common_code_issues(code):
     """Fix common issues in generated code
     
@@ -546,48 +739,45 @@ def fix_common_code_issues(code):
     class_defs = {}  # Store class names and their line numbers
     method_defs = {}  # Store method names and their line numbers
     fixed_lines = []
+    current_class = None  # Class whose body we are currently in
+    current_class_indent = -1
     
     # First pass: identify duplicate definitions and track classes and methods
     i = 0
     while i < len(lines):
         line = lines[i].strip()
         
+        # Leave the current class once a statement is dedented to its level
+        if current_class and line and not line.startswith('#'):
+            if len(lines[i]) - len(lines[i].lstrip()) <= current_class_indent:
+                current_class = None
+        
         # Check for class definitions
-        class_match = re.match(r'^class\s+(\w+)', line)
+        class_match = _CLASS_RE.match(line)
         if class_match:
             class_name = class_match.group(1)
             if class_name in class_defs:
                 # Skip duplicate class definition
                 # Find where this class definition ends
-                j = i + 1
-                indent_level = 0
-                while j < len(lines) and (not lines[j].strip() or lines[j].startswith(' ') or lines[j].startswith('\t')):
-                    j += 1
-                i = j  # Skip to the end of this duplicate class
+                i = _block_end(lines, i + 1, 0)  # Skip to the end of this duplicate class
                 continue
             else:
                 class_defs[class_name] = i
+                current_class = class_name
+                current_class_indent = len(lines[i]) - len(lines[i].lstrip())
         
         # Check for method definitions
-        method_match = re.match(r'^\s*def\s+(\w+)', line)
+        method_match = _METHOD_RE.match(line)
         if method_match:
             method_name = method_match.group(1)
             # Check if this is a duplicate method in the same class
-            current_class = None
-            for cls, line_num in class_defs.items():
-                if line_num < i:
-                    current_class = cls
-            
             method_key = f"{current_class}.{method_name}" if current_class else method_name
             
             if method_key in method_defs and method_name != "__init__":
                 # Skip duplicate method definition
                 # Find where this method definition ends
-                j = i + 1
                 indent_level = len(lines[i]) - len(lines[i].lstrip())
-                while j < len(lines) and (not lines[j].strip() or len(lines[j]) - len(lines[j].lstrip()) > indent_level):
-                    j += 1
-                i = j  # Skip to the end of this duplicate method
+                i = _block_end(lines, i + 1, indent_level)  # Skip to the end of this duplicate method
                 continue
             else:
                 method_defs[method_key] = i
@@ -621,127 +811,96 @@ def fix_incomplete_node_class(code):
     """
     lines = code.split('\n')
     
-    # Check if there's a TreeNode class and a BinarySearchTree class with similar attributes
-    tree_node_match = re.search(r'class\s+(TreeNode|Node)\s*:', code)
-    bst_match = re.search(r'class\s+(BinarySearchTree|BST)\s*:', code)
+    # Index the lines once: the first TreeNode and BST classes, and every
+    # __init__ method that takes a key/val/value parameter
+    tree_node_line = bst_line = None
+    tree_node_match = bst_match = None
+    key_init_lines = []
+    for i, line in enumerate(lines):
+        if tree_node_match is None:
+            tree_node_match = _TREE_NODE_CLASS_RE.match(line)
+            if tree_node_match:
+                tree_node_line = i
+                continue
+        if bst_match is None:
+            bst_match = _BST_CLASS_RE.match(line)
+            if bst_match:
+                bst_line = i
+                continue
+        if _KEY_INIT_RE.match(line):
+            key_init_lines.append(i)
+    
+    if not (tree_node_match and bst_match):
+        return code
+    
+    tree_node_class = tree_node_match.group(2)
+    tree_node_indent = tree_node_match.group(1)
+    
+    # Check for empty TreeNode class
+    tree_node_end = _block_end(lines, tree_node_line + 1, len(tree_node_indent))
+    if any(line.strip() for line in lines[tree_node_line + 1:tree_node_end]):
+        return code
+    
+    # Check for common issue where BST has TreeNode-like init
+    bst_end = _block_end(lines, bst_line + 1, len(bst_match.group(1)))
+    bst_init_line = next((i for i in key_init_lines if bst_line < i < bst_end), None)
+    if bst_init_line is None:
+        return code
     
-    if tree_node_match and bst_match:
-        tree_node_class = tree_node_match.group(1)
-        bst_class = bst_match.group(1)
+    # The BST class has a TreeNode-like init, and TreeNode is empty
+    # This is a common pattern where the model duplicated functionality
+    bst_init_end = _trimmed_block_end(lines, bst_init_line)
+    bst_init_indent = lines[bst_init_line][:len(lines[bst_init_line]) - len(lines[bst_init_line].lstrip())]
+    node_indent = tree_node_indent + '    '
+    
+    # Now check if we can find a proper TreeNode init that could work
+    proper_node_init = None
+    for i in key_init_lines:
+        end = _trimmed_block_end(lines, i)
+        if any(_KEY_ASSIGN_RE.search(line) for line in lines[i + 1:end]):
+            proper_node_init = (i, end)
+            break
+    
+    if proper_node_init:
+        # We found a proper TreeNode init, re-indent it for the TreeNode class
+        start, end = proper_node_init
+        init_indent = len(lines[start]) - len(lines[start].lstrip())
+        node_init = [node_indent + line[init_indent:] if line.strip() else ''
+                     for line in lines[start:end]]
+    else:
+        # No proper TreeNode init found, create one from the BST init
+        bst_init_method = '\n'.join(lines[bst_init_line:bst_init_end])
         
-        # Check for common issue where BST has TreeNode-like init
-        bst_init_with_key = re.search(
-            rf'class\s+{bst_class}\s*:.*?def\s+__init__\s*\(\s*self\s*,\s*(?:key|val|value).*?\)',
-            code, re.DOTALL)
+        # Extract the key parameter name from the BST init
+        key_param = _INIT_KEY_PARAM_RE.search(lines[bst_init_line])
+        key_param = key_param.group(1) if key_param else 'key'
         
-        # Check for empty TreeNode class
-        empty_treenode = re.search(
-            rf'class\s+{tree_node_class}\s*:(?:\s*\n\s*|$)', 
-            code)
+        # Use the BST init attributes for TreeNode
+        attributes = []
+        for attr, attr_re in _NODE_ATTR_RES.items():
+            if attr_re.search(bst_init_method):
+                if attr in ['key', 'val', 'value']:
+                    attributes.append(f'self.{attr} = {key_param}')
+                else:
+                    attributes.append(f'self.{attr} = None')
         
-        if bst_init_with_key and empty_treenode:
-            # The BST class has a TreeNode-like init, and TreeNode is empty
-            # This is a common pattern where the model duplicated functionality
-            
-            # First, find the BST init
-            bst_init_start = bst_init_with_key.start()
-            
-            # Find which line has the BST init
-            line_count = 0
-            bst_init_line = 0
-            for i, line in enumerate(lines):
-                line_count += len(line) + 1  # +1 for newline
-                if line_count > bst_init_start:
-                    bst_init_line = i
-                    break
-            
-            # Find the indentation of the init method
-            bst_init_indent = len(lines[bst_init_line]) - len(lines[bst_init_line].lstrip())
-            
-            # Find the end of the init method
-            j = bst_init_line + 1
-            while j < len(lines) and (not lines[j].strip() or len(lines[j]) - len(lines[j].lstrip()) > bst_init_indent):
-                j += 1
-            
-            # Extract the BST init method
-            bst_init_method = '\n'.join(lines[bst_init_line:j])
-            
-            # Now check if we can find a proper TreeNode init that could work
-            proper_node_init = re.search(
-                rf'def\s+__init__\s*\(\s*self\s*,\s*(?:key|val|value).*?\).*?self\.(?:key|val|value)\s*=\s*(?:key|val|value)',
-                code, re.DOTALL)
-            
-            if proper_node_init:
-                # We found a proper TreeNode init elsewhere, extract and use it
-                node_init_start = proper_node_init.start()
-                
-                # Find which line has the proper node init
-                line_count = 0
-                node_init_line = 0
-                for i, line in enumerate(lines):
-                    line_count += len(line) + 1  # +1 for newline
-                    if line_count > node_init_start:
-                        node_init_line = i
-                        break
-                
-                # Find the indentation of the init method
-                node_init_indent = len(lines[node_init_line]) - len(lines[node_init_line].lstrip())
-                
-                # Find the end of the init method
-                j = node_init_line + 1
-                while j < len(lines) and (not lines[j].strip() or len(lines[j]) - len(lines[j].lstrip()) > node_init_indent):
-                    j += 1
-                
-                # Extract the proper node init method
-                proper_node_init_method = '\n'.join(lines[node_init_line:j])
-                
-                # Update the TreeNode class with the proper init
-                tree_node_pattern = rf'class\s+{tree_node_class}\s*:(?:\s*\n\s*|$)'
-                # Make sure to indent the init method correctly
-                indented_init = proper_node_init_method.replace('def ', '    def ')
-                replacement = f'class {tree_node_class}:\n{indented_init}\n'
-                
-                code = re.sub(tree_node_pattern, replacement, code)
-                
-                # Now fix the BST class to have a proper init without the TreeNode attributes
-                bst_pattern = rf'class\s+{bst_class}\s*:.*?def\s+__init__\s*\(\s*self\s*,\s*(?:key|val|value).*?\)(.*?)(?:\n\s*def|\n\s*$)'
-                replacement = f'class {bst_class}:\n    def __init__(self):\n        self.root = None\n'
-                
-                code = re.sub(bst_pattern, replacement, code, flags=re.DOTALL)
-            else:
-                # No proper TreeNode init found, create one from the BST init
-                # First, fix the BST init to be a proper BST init
-                bst_pattern = rf'class\s+{bst_class}\s*:.*?def\s+__init__\s*\(\s*self\s*,\s*(?:key|val|value).*?\)(.*?)(?:\n\s*def|\n\s*$)'
-                replacement = f'class {bst_class}:\n    def __init__(self):\n        self.root = None\n'
-                
-                code = re.sub(bst_pattern, replacement, code, flags=re.DOTALL)
-                
-                # Now create a proper TreeNode init from the BST init
-                tree_node_pattern = rf'class\s+{tree_node_class}\s*:(?:\s*\n\s*|$)'
-                # Extract the key parameter name from the BST init
-                key_param = re.search(r'def\s+__init__\s*\(\s*self\s*,\s*(\w+)', bst_init_method)
-                key_param = key_param.group(1) if key_param else 'key'
-                
-                # Use the BST init attributes for TreeNode
-                attributes = []
-                for attr in ['key', 'val', 'value', 'left', 'right']:
-                    if re.search(rf'self\.{attr}\s*=', bst_init_method):
-                        if attr in ['key', 'val', 'value']:
-                            attributes.append(f'self.{attr} = {key_param}')
-                        else:
-                            attributes.append(f'self.{attr} = None')
-                
-                # If no attributes found, use default attributes
-                if not attributes:
-                    attributes = [f'self.key = {key_param}', 'self.left = None', 'self.right = None']
-                
-                # Create the TreeNode init
-                indented_attributes = '\n        '.join(attributes)
-                replacement = f'class {tree_node_class}:\n    def __init__(self, {key_param}):\n        {indented_attributes}\n'
-                
-                code = re.sub(tree_node_pattern, replacement, code)
+        # If no attributes found, use default attributes
+        if not attributes:
+            attributes = [f'self.key = {key_param}', 'self.left = None', 'self.right = None']
+        
+        node_init = [f'{node_indent}def __init__(self, {key_param}):']
+        node_init.extend(f'{node_indent}    {attr}' for attr in attributes)
     
-    return code
+    # Fix the BST class to have a proper init without the TreeNode attributes
+    bst_init = [f'{bst_init_indent}def __init__(self):', f'{bst_init_indent}    self.root = None']
+    
+    # Replace the later block first so the earlier line numbers stay valid
+    replacements = [(tree_node_line + 1, tree_node_line + 1, node_init),
+                    (bst_init_line, bst_init_end, bst_init)]
+    for start, end, new_lines in sorted(replacements, reverse=True):
+        lines[start:end] = new_lines
+    
+    return '\n'.join(lines)
 
 def fix_duplicate_init_methods(code):
     """Fix duplicate __init__ methods in the same class
@@ -752,60 +911,70 @@ def fix_duplicate_init_methods(code):
     Returns:
         str: Fixed code
     """
+    # Fewer than two __init__ methods means there is nothing to deduplicate
+    if code.count('__init__') <= 1:
+        return code
+    
     lines = code.split('\n')
     class_name = None
-    init_methods = {}  # class_name -> list of (line_number, end_line, code)
-    i = 0
-    
-    # Find all init methods
-    while i < len(lines):
-        line = lines[i].strip()
+    init_methods = {}  # class_name -> (list of start lines, list of end lines)
+    
+    # Find all class definitions and init methods in one scan over the text,
+    # tracking the line number as we go
+    line_no = 0
+    pos = 0
+    skip_until = 0  # Lines inside an init method already found
+    for match in _CLASS_OR_INIT_RE.finditer(code):
+        line_no += code.count('\n', pos, match.start())
+        pos = match.start()
+        if line_no < skip_until:
+            continue
         
         # Track class definitions
-        class_match = re.match(r'^class\s+(\w+)', line)
-        if class_match:
-            class_name = class_match.group(1)
-        
-        # Check for __init__ method
-        init_match = re.match(r'^\s*def\s+__init__\s*\(', line)
-        if init_match and class_name:
+        if match.group('cls'):
+            class_name = match.group('cls')
+        elif class_name:
             # This is an __init__ method in a class
-            start_line = i
-            init_indent = len(lines[i]) - len(lines[i].lstrip())
+            init_indent = len(match.group('indent'))
             
             # Find the end of the init method
-            j = i + 1
-            while j < len(lines) and (not lines[j].strip() or len(lines[j]) - len(lines[j].lstrip()) > init_indent):
-                j += 1
+            j = _block_end(lines, line_no + 1, init_indent)
             
             # Store this init method
-            if class_name not in init_methods:
-                init_methods[class_name] = []
+            starts, ends = init_methods.setdefault(class_name, ([], []))
+            starts.append(line_no)
+            ends.append(j)
             
-            init_methods[class_name].append((start_line, j, '\n'.join(lines[start_line:j])))
-            
-            i = j
-            continue
-        
-        i += 1
+            skip_until = j
     
     # Now, fix classes with multiple init methods
-    for class_name, inits in init_methods.items():
-        if len(inits) > 1:
+    removals = []
+    for class_name, (starts, ends) in init_methods.items():
+        if len(starts) > 1:
             # Multiple init methods found
             # Strategy: Keep the most complex one (usually the one with more parameters or lines)
-            best_init = max(inits, key=lambda x: (len(x[2].split(',')), len(x[2].split('\n'))))
+            # (counted straight from the lines, without joining the init source)
+            best = max(range(len(starts)),
+                       key=lambda k: (sum(l.count(',') for l in lines[starts[k]:ends[k]]), ends[k] - starts[k]))
             
             # Remove all but the best init
-            to_remove = [init for init in inits if init != best_init]
-            
-            # Sort in reverse order to avoid changing line numbers
-            to_remove.sort(key=lambda x: x[0], reverse=True)
-            
-            for start, end, _ in to_remove:
-                lines = lines[:start] + lines[end:]
+            removals.extend((starts[k], ends[k]) for k in range(len(starts)) if k != best)
     
-    return '\n'.join(lines)
+    # Nothing was duplicated, so hand back the original text without rejoining
+    if not removals:
+        return code
+    
+    # Drop every removed range in a single pass; all ranges refer to the
+    # original line numbers
+    removals.sort()
+    kept_lines = []
+    pos = 0
+    for start, end in removals:
+        kept_lines.extend(lines[pos:start])
+        pos = end
+    kept_lines.extend(lines[pos:])
+    
+    return '\n'.join(kept_lines)
 
 def generate_project_name(prompt, code):
     """Generate a project name from the prompt or code
@@ -817,22 +986,27 @@ def generate_project_name(prompt, code):
     Returns:
         str: A suitable project name
     """
-    # Extract key terms from the prompt
-    keywords = re.findall(r'\b[a-zA-Z][a-zA-Z0-9_]{2,}\b', prompt.lower())
-    
-    # Filter out common words
-    common_words = {'the', 'and', 'that', 'with', 'for', 'create', 'implement', 'build', 'make', 'code', 'write', 'script', 'program', 'python'}
-    keywords = [word for word in keywords if word not in common_words]
+    # Extract up to 3 key terms from the prompt, skipping common words
+    keywords = []
+    for match in _KEYWORD_RE.finditer(prompt.lower()):
+        word = match.group(0)
+        if word not in _PROJECT_NAME_COMMON_WORDS:
+            keywords.append(word)
+            if len(keywords) == 3:
+                break
     
     # If we have keywords, use those to create a name
     if keywords:
-        project_name = '_'.join(keywords[:3])  # Use up to 3 keywords
+        project_name = '_'.join(keywords)
     else:
         # Fall back to the content-based naming
         project_name = generate_filename_from_content(code, prompt).replace('.py', '')
     
     # Ensure the name is a valid directory name
-    project_name = re.sub(r'[^\w_]', '_', project_name)
+    if project_name.isascii():
+        project_name = project_name.translate(_SANITIZE_NAME_TABLE)
+    else:
+        project_name = _SANITIZE_NAME_RE.sub('_', project_name)
     
     # Limit length and make it more readable
     if len(project_name) > 30:
@@ -840,88 +1014,101 @@ def generate_project_name(prompt, code):
     
     return project_name
 
-def generate_requirements_file(code, project_dir):
-    """Generate a requirements.txt file based on the imports in the code
+def _iter_top_level_packages(code):
+    """Yield the top-level package of every import statement in the code
     
     Args:
         code (str): The code to analyze for imports
-        project_dir (str): The directory to save the requirements.txt file
+        
+    Yields:
+        str: Package names (before any dot), possibly repeated
     """
-    # Extract all import statements
-    import_lines = []
-    for line in code.split('\n'):
-        line = line.strip()
-        if line.startswith('import ') or (line.startswith('from ') and ' import ' in line):
-            import_lines.append(line)
-    
-    # Extract package names from import statements
-    packages = set()
-    for line in import_lines:
-        if line.startswith('import '):
+    for match in _IMPORT_RE.finditer(code):
+        imported, from_package = match.groups()
+        if imported is not None:
             # Handle 'import package' and 'import package1, package2'
-            parts = line[7:].split(',')
-            for part in parts:
+            for part in imported.split(','):
                 # Handle 'import package as alias'
                 package = part.split(' as ')[0].strip()
                 # Get the main package (before any dot)
-                main_package = package.split('.')[0]
-                packages.add(main_package)
-        else:  # from X import Y
-            # Handle 'from package import ...'
-            package = line.split('from ')[1].split(' import')[0].strip()
-            # Get the main package (before any dot)
-            main_package = package.split('.')[0]
-            packages.add(main_package)
-    
-    # Filter out standard library packages
-    std_lib_modules = {
-        'abc', 'argparse', 'array', 'ast', 'asyncio', 'base64', 'bisect', 'calendar',
-        'collections', 'concurrent', 'contextlib', 'copy', 'csv', 'datetime', 'decimal',
-        'difflib', 'enum', 'errno', 'fnmatch', 'functools', 'gc', 'glob', 'gzip', 'hashlib',
-        'heapq', 'hmac', 'html', 'http', 'importlib', 'inspect', 'io', 'itertools', 'json',
-        'logging', 'math', 'multiprocessing', 'operator', 'os', 'pathlib', 'pickle', 'platform',
-        'pprint', 'queue', 'random', 're', 'shutil', 'signal', 'socket', 'sqlite3', 'ssl',
-        'statistics', 'string', 'struct', 'subprocess', 'sys', 'tempfile', 'threading',
-        'time', 'timeit', 'traceback', 'types', 'typing', 'uuid', 'warnings', 'weakref',
-        'xml', 'xmlrpc', 'zipfile', 'zlib', 'tkinter', 'tk', 'ttk'
-    }
+                yield package.split('.')[0]
+        elif not from_package.startswith('.'):
+            # Handle 'from package import ...' (relative imports are local)
+            yield from_package.split('.')[0]
+
+def generate_requirements_file(code, project_dir):
+    """Generate a requirements.txt file based on the imports in the code
     
-    third_party_packages = packages - std_lib_modules
-    
-    # Map common package imports to their PyPI names
-    package_mapping = {
-        'bs4': 'beautifulsoup4',
-        'sklearn': 'scikit-learn',
-        'PIL': 'pillow',
-        'cv2': 'opencv-python',
-        'pygame': 'pygame',
-        'np': 'numpy',
-        'pd': 'pandas',
-        'plt': 'matplotlib',
-        'tf': 'tensorflow',
-        'torch': 'torch',
-        'db': 'sqlalchemy',
-    }
+    Args:
+        code (str): The code to analyze for imports
+        project_dir (str): The directory to save the requirements.txt file
+    """
+    # Nothing to do for code without imports ('from x import y' contains 'import' too)
+    if 'import' not in code:
+        return
     
-    # Apply the mapping
-    requirements = []
-    for pkg in third_party_packages:
-        if pkg in package_mapping:
-            requirements.append(package_mapping[pkg])
-        else:
-            requirements.append(pkg)
+    # Extract package names from all import statements
+    packages = set(_iter_top_level_packages(code))
     
-    # Sort the requirements alphabetically
-    requirements.sort()
+    # Filter out standard library packages and map common package imports
+    # to their PyPI names
+    requirements = sorted(_PACKAGE_MAPPING.get(pkg, pkg) for pkg in packages if pkg not in _STD_LIB_MODULES)
     
     # Write the requirements to a file
     if requirements:
         try:
             with open(os.path.join(project_dir, 'requirements.txt'), 'w') as f:
-                f.write('\n'.join(requirements))
-            print(Fore.GREEN + "Generated requirements.txt file with detected dependencies")
+                f.writelines(f"{pkg}\n" for pkg in requirements)
+            colored_print("Generated requirements.txt file with detected dependencies", 'green')
         except Exception as e:
-            print(Fore.RED + f"Error creating requirements.txt: {e}")
+            colored_print(f"Error creating requirements.txt: {e}", 'red')
+
+def save_code_to_file(code, prompt, args):
+    """Save the code to a file, optionally inside a new project folder
+    
+    Args:
+        code (str): The code to save
+        prompt (str): The prompt used to generate the code
+        args: Parsed command line arguments
+    """
+    file_path = args.output
+    
+    # Generate a filename based on the prompt if auto-save is enabled
+    if args.auto_save and not file_path:
+        # Extract a suitable filename from the first line of code or the prompt
+        file_path = generate_filename_from_content(code, prompt)
+    
+    if file_path:
+        try:
+            # Create a project folder if requested and save the file straight into it
+            project_dir = None
+            if args.project_folder:
+                project_name = generate_project_name(prompt, code)
+                project_dir = project_name  # Relative to the current directory
+                
+                # Create project directory if it doesn't exist
+                try:
+                    os.makedirs(project_dir)
+                    colored_print(f"\nCreated project folder: {project_name}", 'green')
+                except FileExistsError:
+                    if not os.path.isdir(project_dir):
+                        colored_print(f"\nError creating project folder: {project_name} exists and is not a directory", 'red')
+                        project_dir = os.curdir  # Fallback to current directory
+                except Exception as e:
+                    colored_print(f"\nError creating project folder: {e}", 'red')
+                    project_dir = os.curdir  # Fallback to current directory
+                
+                file_path = os.path.join(project_dir, os.path.basename(file_path))
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            colored_print(f"\nCode saved to file: {file_path}", 'green')
+            
+            # Generate requirements.txt if project folder is created
+            if project_dir is not None:
+                generate_requirements_file(code, project_dir)
+        except Exception as e:
+            colored_print(f"\nError saving to file: {e}", 'red')
 
 def main():
     # Parse command line arguments
@@ -984,57 +1171,26 @@ def main():
             if original_code != completion_to_copy:
                 colored_print("\nFixed common code issues", 'green')
         
-        # Copy to clipboard
-        if not args.no_copy:
-            pyperclip.copy(completion_to_copy)
-            colored_print("\nResponse copied to clipboard", 'blue')
-            if args.code_only:
-                colored_print("(Code blocks only)", 'blue')
-            if args.clean:
-                colored_print("(Cleaned for execution)", 'blue')
-            if args.fix:
-                colored_print("(Fixed common issues)", 'blue')
-        
-        # Save to file if specified
-        if args.output or args.auto_save:
-            file_path = args.output
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            # Copy to clipboard in the background while the file is being saved
+            clipboard_future = None
+            if not args.no_copy:
+                clipboard_future = executor.submit(pyperclip.copy, completion_to_copy)
             
-            # Generate a filename based on the prompt if auto-save is enabled
-            if args.auto_save and not file_path:
-                # Extract a suitable filename from the first line of code or the prompt
-                file_path = generate_filename_from_content(completion_to_copy, prompt)
+            # Save to file if specified
+            if args.output or args.auto_save:
+                save_code_to_file(completion_to_copy, prompt, args)
             
-            if file_path:
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(completion_to_copy)
-                    colored_print(f"\nCode saved to file: {file_path}", 'green')
-                    
-                    # Create a project folder if requested
-                    if args.project_folder:
-                        project_name = generate_project_name(prompt, completion_to_copy)
-                        project_dir = os.path.join(os.getcwd(), project_name)
-                        
-                        # Create project directory if it doesn't exist
-                        if not os.path.exists(project_dir):
-                            try:
-                                os.makedirs(project_dir)
-                                colored_print(f"\nCreated project folder: {project_name}", 'green')
-                            except Exception as e:
-                                colored_print(f"\nError creating project folder: {e}", 'red')
-                                project_dir = os.getcwd()  # Fallback to current directory
-                        
-                        # Move the saved file to the project folder
-                        try:
-                            os.replace(file_path, os.path.join(project_dir, os.path.basename(file_path)))
-                            colored_print(f"\nMoved file to project folder: {project_name}", 'green')
-                        except Exception as e:
-                            colored_print(f"\nError moving file to project folder: {e}", 'red')
-                        
-                        # Generate requirements.txt if project folder is created
-                        generate_requirements_file(completion_to_copy, project_dir)
-                except Exception as e:
-                    colored_print(f"\nError saving to file: {e}", 'red')
+            # Wait for the clipboard copy, re-raising any error
+            if clipboard_future is not None:
+                clipboard_future.result()
+                colored_print("\nResponse copied to clipboard", 'blue')
+                if args.code_only:
+                    colored_print("(Code blocks only)", 'blue')
+                if args.clean:
+                    colored_print("(Cleaned for execution)", 'blue')
+                if args.fix:
+                    colored_print("(Fixed common issues)", 'blue')
         
         # Show stats
         elapsed = end_time - start_time